@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the text processing pipeline
+Times every stage on synthetic inputs and writes machine-readable JSON results
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'scripts'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from create_chunks import create_chunks, save_chunks
+from extract_chunks_batch import extract_chunks
+from format_output import (parse_chunks_file, parse_summaries_file,
+                           create_html, create_markdown, create_text)
+from synthetic import generate_text, write_epub
+from word_offsets import build_word_offsets
+
+def measure(func, repeats=3, trace_memory=True):
+    """
+    Time a callable and optionally record its peak traced memory
+    
+    Timing runs happen without tracemalloc, which slows allocation-heavy
+    code considerably; the memory figure comes from one extra traced run.
+    
+    Returns:
+        Dictionary with timing and memory statistics
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    
+    result = {
+        'seconds_min': min(times),
+        'seconds_median': sorted(times)[len(times) // 2],
+        'repeats': repeats,
+    }
+    
+    if trace_memory:
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result['peak_traced_bytes'] = peak
+    
+    return result
+
+def make_summaries_file(chunks, output_file):
+    """Write one synthetic 150-word summary per chunk in the summaries format"""
+    # One shared summary text keeps generation cheap; parsers do not care
+    summary_text = generate_text(150, seed=1).replace('\n\n', ' ')
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(f"=== SUMMARY {chunk['number']}: Words {chunk['start']}-{chunk['end']} ===\n")
+            f.write("Word count: 150\n")
+            f.write(summary_text)
+            f.write("\n\n")
+
+def bench_text(word_count, work_dir, args):
+    """Benchmark the universal (non-EPUB) stages on a plain-text corpus"""
+    results = []
+    
+    def record(stage, func):
+        stats = measure(func, args.repeats, not args.no_memory)
+        stats.update({'stage': stage, 'input': 'text', 'words': word_count})
+        results.append(stats)
+        if args.verbose:
+            print(f"  {stage:<22} {stats['seconds_min']:.4f}s")
+    
+    text = generate_text(word_count)
+    chunks = create_chunks(text)
+    chunks_file = work_dir / f"text_{word_count}_chunks.txt"
+    summaries_file = work_dir / f"text_{word_count}_summaries.txt"
+    save_chunks(chunks, chunks_file)
+    make_summaries_file(chunks, summaries_file)
+    summaries = parse_summaries_file(summaries_file)
+    
+    # Extract the last few chunks, the worst case for the per-chunk regex scan
+    last = len(chunks)
+    first = max(1, last - args.extract_count + 1)
+    
+    def run_extract():
+        with contextlib.redirect_stdout(io.StringIO()):
+            extract_chunks(str(chunks_file), first, last)
+    
+    clean_text = _clean_text()
+    if clean_text:
+        record('clean_text', lambda: clean_text(text))
+    record('build_word_offsets', lambda: build_word_offsets(text))
+    record('create_chunks', lambda: create_chunks(text))
+    record('save_chunks', lambda: save_chunks(chunks, chunks_file))
+    record('parse_chunks_file', lambda: parse_chunks_file(chunks_file))
+    record('extract_chunks', run_extract)
+    record('parse_summaries_file', lambda: parse_summaries_file(summaries_file))
+    record('create_html', lambda: create_html(
+        'Benchmark', 'Author', chunks, summaries, work_dir / 'out.html'))
+    record('create_markdown', lambda: create_markdown(
+        'Benchmark', 'Author', chunks, summaries, work_dir / 'out.md'))
+    record('create_text', lambda: create_text(
+        'Benchmark', 'Author', chunks, summaries, work_dir / 'out.txt'))
+    
+    return results
+
+def bench_epub(members, work_dir, args):
+    """Benchmark EPUB extraction and markup cleaning on a synthetic EPUB"""
+    try:
+        from extract_book_section_fixed import extract_section, clean_text
+    except ImportError as e:
+        print(f"Skipping EPUB benchmarks: {e}")
+        return []
+    
+    epub_file = write_epub(work_dir / f"book_{members}.epub", members,
+                           args.words_per_member, args.markup_density, args.noise,
+                           args.calibre)
+    word_count = members * args.words_per_member
+    
+    import zipfile
+    with zipfile.ZipFile(epub_file) as epub:
+        raw_markup = '\n'.join(epub.read(name).decode('utf-8')
+                               for name in epub.namelist() if name.endswith('.html'))
+    
+    results = []
+    for stage, func in (
+        ('extract_section', lambda: extract_section(epub_file)),
+        ('clean_text_markup', lambda: clean_text(raw_markup)),
+    ):
+        stats = measure(func, args.repeats, not args.no_memory)
+        stats.update({'stage': stage, 'input': 'epub', 'words': word_count,
+                      'members': members})
+        results.append(stats)
+        if args.verbose:
+            print(f"  {stage:<22} {stats['seconds_min']:.4f}s")
+    
+    return results
+
+def _clean_text():
+    """
+    Import clean_text lazily; its module needs BeautifulSoup at import time
+    
+    Returns None (after printing a notice) when it cannot be imported, so
+    the stage is skipped rather than timed as a stand-in.
+    """
+    try:
+        from extract_book_section_fixed import clean_text
+    except ImportError as e:
+        print(f"Skipping clean_text benchmark: {e}")
+        return None
+    return clean_text
+
+def environment_info():
+    """Describe the machine and commit so result files can be compared"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+    }
+
+def compare_results(current, baseline_file):
+    """Print per-stage timing ratios against a previous results file"""
+    with open(baseline_file, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    
+    def key(r):
+        return (r['stage'], r['input'], r['words'])
+    
+    previous = {key(r): r for r in baseline['results']}
+    print(f"\nComparison with {baseline_file} ({baseline['environment'].get('commit')}):")
+    for r in current['results']:
+        old = previous.get(key(r))
+        if old:
+            ratio = r['seconds_min'] / old['seconds_min'] if old['seconds_min'] else float('inf')
+            print(f"  {r['stage']:<22} {r['words']:>10,} words  "
+                  f"{old['seconds_min']:.4f}s -> {r['seconds_min']:.4f}s  ({ratio:.2f}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every pipeline stage on synthetic input')
+    parser.add_argument('-o', '--output', default='bench_results.json',
+                       help='JSON results file (default: bench_results.json)')
+    parser.add_argument('-w', '--words', type=int, nargs='+',
+                       default=[10000, 100000, 1000000],
+                       help='Plain-text corpus sizes in words (default: 10000 100000 1000000)')
+    parser.add_argument('-m', '--members', type=int, nargs='+', default=[10, 50],
+                       help='EPUB member counts (default: 10 50)')
+    parser.add_argument('--words-per-member', type=int, default=2000,
+                       help='Words in each EPUB member (default: 2000)')
+    parser.add_argument('--markup-density', type=float, default=0.05,
+                       help='Fraction of EPUB words wrapped in inline tags (default: 0.05)')
+    parser.add_argument('--noise', type=float, default=0.01,
+                       help='Fraction of EPUB words followed by filepos anchors (default: 0.01)')
+    parser.add_argument('--calibre', type=float, default=1.0,
+                       help='Fraction of EPUB tags carrying calibreN classes (default: 1.0)')
+    parser.add_argument('-r', '--repeats', type=int, default=3,
+                       help='Timed runs per stage (default: 3)')
+    parser.add_argument('--extract-count', type=int, default=20,
+                       help='Chunks to extract in the extract_chunks stage (default: 20)')
+    parser.add_argument('--no-memory', action='store_true',
+                       help='Skip the tracemalloc pass')
+    parser.add_argument('--compare', help='Previous results file to compare against')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                       help='Print timings as they are measured')
+    
+    args = parser.parse_args()
+    
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        for word_count in args.words:
+            print(f"Text corpus: {word_count:,} words")
+            results.extend(bench_text(word_count, work_dir, args))
+        for members in args.members:
+            print(f"EPUB: {members} members")
+            results.extend(bench_epub(members, work_dir, args))
+    
+    environment = environment_info()
+    # ru_maxrss is a process-wide high-water mark (kilobytes on Linux), so it
+    # describes the whole run rather than any one stage
+    environment['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    
+    report = {
+        'environment': environment,
+        'parameters': vars(args),
+        'results': results,
+    }
+    
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved results: {args.output}")
+    
+    if args.compare:
+        compare_results(report, args.compare)
+
+if __name__ == "__main__":
+    main()
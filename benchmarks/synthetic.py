@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Synthetic input generators for the benchmark suite
+Builds reproducible plain-text corpora and EPUB files of any size
+"""
+
+import argparse
+import random
+import zipfile
+from pathlib import Path
+
+# Small fixed vocabulary so generated text tokenizes like ordinary prose
+VOCABULARY = (
+    "the of and to in a was he that it his her with as had for she on at by "
+    "not be from but which all were they this you one we an have would said "
+    "there their been what so who into him could when more no if out time "
+    "upon man now very about only then did than some little over your my "
+    "house night river letter window morning silence garden voice stranger "
+    "remembered whispered carried opened followed answered believed returned"
+).split()
+
+PARAGRAPH_WORDS = 120
+
+def generate_words(word_count, seed=0):
+    """
+    Yield word_count pseudo-random words in blocks of sentence-like text
+    
+    Args:
+        word_count: Total number of words to produce
+        seed: Random seed so runs on different commits see identical input
+        
+    Yields:
+        Paragraph strings of roughly PARAGRAPH_WORDS words each
+    """
+    rng = random.Random(seed)
+    remaining = word_count
+    while remaining > 0:
+        n = min(PARAGRAPH_WORDS, remaining)
+        words = rng.choices(VOCABULARY, k=n)
+        words[0] = words[0].capitalize()
+        # Sprinkle sentence breaks so the text is not one endless sentence
+        for i in range(11, n - 1, 12):
+            words[i] += '.'
+            words[i + 1] = words[i + 1].capitalize()
+        words[-1] += '.'
+        remaining -= n
+        yield ' '.join(words)
+
+def generate_text(word_count, seed=0):
+    """Return a synthetic plain-text corpus of exactly word_count words"""
+    return '\n\n'.join(generate_words(word_count, seed))
+
+def write_text_corpus(output_file, word_count, seed=0):
+    """
+    Stream a synthetic plain-text corpus to disk without holding it in memory
+    
+    Returns:
+        Path of the written file
+    """
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for i, paragraph in enumerate(generate_words(word_count, seed)):
+            if i:
+                f.write('\n\n')
+            f.write(paragraph)
+    return output_path
+
+def _calibre_class(rng, calibre):
+    """A calibreN class attribute with probability calibre, else nothing"""
+    if calibre and rng.random() < calibre:
+        return f' class="calibre{rng.randint(1, 40)}"'
+    return ''
+
+def _markup_paragraph(paragraph, rng, markup_density, noise, calibre):
+    """Wrap a paragraph in HTML, adding inline tags and calibre/filepos noise"""
+    words = paragraph.split(' ')
+    for i in range(len(words)):
+        if rng.random() < markup_density:
+            tag = rng.choice(('em', 'strong', 'span'))
+            words[i] = f'<{tag}{_calibre_class(rng, calibre)}>{words[i]}</{tag}>'
+        if noise and rng.random() < noise:
+            words[i] += f' <a id="filepos{rng.randint(1000, 9999999)}"></a>'
+    return f'<p{_calibre_class(rng, calibre)}>{" ".join(words)}</p>'
+
+def write_epub(output_file, members=20, words_per_member=2000,
+               markup_density=0.05, noise=0.01, calibre=1.0, seed=0):
+    """
+    Write a synthetic EPUB with numbered HTML members
+    
+    Args:
+        output_file: Path of the EPUB to create
+        members: Number of HTML spine members
+        words_per_member: Words of prose in each member
+        markup_density: Probability that a word is wrapped in an inline tag
+        noise: Probability that a word is followed by a filepos anchor
+        calibre: Probability that a tag carries a calibreN class
+        seed: Random seed
+        
+    Returns:
+        Path of the written EPUB
+    """
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as epub:
+        epub.writestr(zipfile.ZipInfo('mimetype'), 'application/epub+zip')
+        for n in range(members):
+            body = [f'<h2{_calibre_class(rng, calibre)}>Chapter {n + 1}</h2>']
+            for paragraph in generate_words(words_per_member, seed + n + 1):
+                body.append(_markup_paragraph(paragraph, rng, markup_density, noise, calibre))
+            # Unpadded numbering exercises the natural sort in the extractor
+            epub.writestr(
+                f'OEBPS/part{n}.html',
+                '<html><head><style>p { margin: 0 }</style></head><body>\n'
+                + '\n'.join(body)
+                + '\n</body></html>'
+            )
+    return output_path
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic benchmark inputs')
+    parser.add_argument('output', help='Output file (.txt or .epub)')
+    parser.add_argument('-w', '--words', type=int, default=100000,
+                       help='Total words (default: 100000)')
+    parser.add_argument('-m', '--members', type=int, default=20,
+                       help='EPUB member count (default: 20)')
+    parser.add_argument('--markup-density', type=float, default=0.05,
+                       help='Fraction of words wrapped in inline tags (default: 0.05)')
+    parser.add_argument('--noise', type=float, default=0.01,
+                       help='Fraction of words followed by filepos anchors (default: 0.01)')
+    parser.add_argument('--calibre', type=float, default=1.0,
+                       help='Fraction of tags carrying calibreN classes (default: 1.0)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed')
+    
+    args = parser.parse_args()
+    
+    if args.output.endswith('.epub'):
+        path = write_epub(args.output, args.members, max(1, args.words // args.members),
+                          args.markup_density, args.noise, args.calibre, args.seed)
+    else:
+        path = write_text_corpus(args.output, args.words, args.seed)
+    print(f"Created: {path}")
+
+if __name__ == "__main__":
+    main()
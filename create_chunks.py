@@ -7,47 +7,118 @@ Splits any text file into chunks of specified word count
 import argparse
 from pathlib import Path
 
-def create_chunks(text, chunk_size=2000, min_last_chunk=1000):
+from readers import READERS, READ_ERRORS, detect_reader, read_segments
+from word_offsets import build_word_offsets, load_word_offsets, offsets_path
+
+def _make_chunk(number, start, words):
+    """Build a chunk dictionary from its first word position and words"""
+    return {
+        'number': number,
+        'start': start,
+        'end': start + len(words) - 1,
+        'text': ' '.join(words),
+        'word_count': len(words)
+    }
+
+def chunk_ranges(counts, chunk_size=2000, min_last_chunk=1000):
+    """
+    Yield the word ranges of consecutive chunks
+    
+    A last piece shorter than min_last_chunk is merged into the chunk
+    before it. Counts are consumed lazily and each range is yielded as
+    soon as the words after it are counted.
+    
+    Args:
+        counts: Iterable of word counts of consecutive text segments
+        chunk_size: Target words per chunk
+        min_last_chunk: Minimum words for last chunk (merge if less)
+        
+    Yields:
+        (first, last) tuples: zero-based word positions, last exclusive
+    """
+    pending = None  # last full range, held back in case the tail merges into it
+    start = 0
+    total = 0
+    
+    for count in counts:
+        total += count
+        # Only cut when more words follow, so the final piece is always left over
+        while total - start > chunk_size:
+            if pending:
+                yield pending
+            pending = (start, start + chunk_size)
+            start += chunk_size
+    
+    if pending and total - start < min_last_chunk:
+        # Merge the small last piece with the previous chunk
+        yield (pending[0], total)
+        return
+    
+    if pending:
+        yield pending
+    if total > start:
+        yield (start, total)
+
+def iter_chunks(segments, chunk_size=2000, min_last_chunk=1000):
+    """
+    Lazily split a stream of text segments into chunks
+    
+    Produces the same chunks as create_chunks() on the joined text, holding
+    only about two chunks of words in memory. Segment boundaries must fall
+    between words, as they do for every reader in readers.py.
+    
+    Args:
+        segments: Iterable of text strings
+        chunk_size: Target words per chunk
+        min_last_chunk: Minimum words for last chunk (merge if less)
+        
+    Yields:
+        Chunk dictionaries with metadata
+    """
+    words = []
+    base = 0  # word position of words[0]
+    
+    def counts():
+        for segment in segments:
+            split = segment.split()
+            words.extend(split)
+            yield len(split)
+    
+    for number, (first, last) in enumerate(
+            chunk_ranges(counts(), chunk_size, min_last_chunk), 1):
+        chunk = _make_chunk(number, first + 1, words[first - base:last - base])
+        del words[:last - base]
+        base = last
+        yield chunk
+
+def create_chunks(text, chunk_size=2000, min_last_chunk=1000, offsets=None):
     """
     Split text into chunks of approximately chunk_size words
     
+    Chunk boundaries are computed from the word offset table and chunk
+    text is sliced from the original string, so the text is not split
+    into a word list.
+    
     Args:
         text: The text to chunk
         chunk_size: Target words per chunk
         min_last_chunk: Minimum words for last chunk (merge if less)
+        offsets: WordOffsets for text (built if not given)
         
     Returns:
         List of chunk dictionaries with metadata
     """
-    words = text.split()
-    total_words = len(words)
-    chunks = []
+    if offsets is None:
+        offsets = build_word_offsets(text)
+    ranges = chunk_ranges([len(offsets)], chunk_size, min_last_chunk)
     
-    for i in range(0, total_words, chunk_size):
-        chunk_words = words[i:i + chunk_size]
-        
-        # Check if this is the last chunk and too small
-        if i + chunk_size >= total_words and len(chunk_words) < min_last_chunk and chunks:
-            # Merge with previous chunk
-            prev_chunk = chunks.pop()
-            combined_words = prev_chunk['text'].split() + chunk_words
-            chunks.append({
-                'number': len(chunks) + 1,
-                'start': prev_chunk['start'],
-                'end': total_words,
-                'text': ' '.join(combined_words),
-                'word_count': len(combined_words)
-            })
-        else:
-            chunks.append({
-                'number': len(chunks) + 1,
-                'start': i + 1,
-                'end': min(i + chunk_size, total_words),
-                'text': ' '.join(chunk_words),
-                'word_count': len(chunk_words)
-            })
-    
-    return chunks
+    return [{
+        'number': number,
+        'start': first + 1,
+        'end': last,
+        'text': offsets.words(text, first, last),
+        'word_count': last - first
+    } for number, (first, last) in enumerate(ranges, 1)]
 
 def save_chunks(chunks, output_file, format='standard'):
     """
@@ -86,7 +157,7 @@ def save_chunks(chunks, output_file, format='standard'):
 
 def main():
     parser = argparse.ArgumentParser(description='Chunk text files into specified word counts')
-    parser.add_argument('input', help='Input text file')
+    parser.add_argument('input', help='Input file or directory (text, Markdown, EPUB, .gz/.bz2/.xz)')
     parser.add_argument('-o', '--output', help='Output file (default: input_chunks.txt)')
     parser.add_argument('-s', '--size', type=int, default=2000,
                        help='Words per chunk (default: 2000)')
@@ -94,6 +165,8 @@ def main():
                        help='Minimum words for last chunk (default: 1000)')
     parser.add_argument('-f', '--format', choices=['standard', 'json', 'numbered'],
                        default='standard', help='Output format')
+    parser.add_argument('-r', '--reader', choices=list(READERS),
+                       help='Input format (default: detected from the file name)')
     parser.add_argument('-v', '--verbose', action='store_true',
                        help='Print progress information')
     
@@ -105,11 +178,23 @@ def main():
         print(f"Error: Input file '{args.input}' not found")
         return
     
-    with open(input_path, 'r', encoding='utf-8') as f:
-        text = f.read()
-    
-    # Create chunks
-    chunks = create_chunks(text, args.size, args.min_last)
+    # Reuse a persisted word offset table when there is one, else stream the input
+    offsets = None
+    reader = args.reader or detect_reader(input_path)
+    try:
+        if reader == 'text' and offsets_path(input_path).exists():
+            with open(input_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            offsets = load_word_offsets(input_path, text)
+        
+        if offsets is not None:
+            chunks = create_chunks(text, args.size, args.min_last, offsets)
+        else:
+            chunks = list(iter_chunks(read_segments(input_path, args.reader),
+                                      args.size, args.min_last))
+    except READ_ERRORS as e:
+        print(f"Error reading input: {e}")
+        return
     
     # Determine output file
     if args.output:
@@ -121,7 +206,7 @@ def main():
     save_chunks(chunks, output_file, args.format)
     
     # Print summary
-    total_words = len(text.split())
+    total_words = chunks[-1]['end'] if chunks else 0
     print(f"\nChunking Summary:")
     print(f"- Input file: {args.input}")
     print(f"- Total words: {total_words:,}")
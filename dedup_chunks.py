@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate chunk detection with MinHash and LSH banding
+Finds repeated chunks within a book or across a batch so they are summarized once
+"""
+
+import argparse
+import json
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+from format_output import parse_chunks_file, parse_summaries_file
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+SHINGLE_BASE = np.uint64(1000003)
+
+def _word_hashes(words, cache):
+    """32-bit hash of each word; crc32 is stable across interpreter runs"""
+    hashes = np.empty(len(words), dtype=np.uint64)
+    for i, word in enumerate(words):
+        h = cache.get(word)
+        if h is None:
+            h = cache[word] = zlib.crc32(word.encode('utf-8'))
+        hashes[i] = h
+    return hashes
+
+def shingle_hashes(text, shingle_size=5, cache=None):
+    """
+    Hash every run of shingle_size consecutive words in a text
+    
+    Shingle hashes are a polynomial combination of word hashes computed
+    over whole arrays at once, folded to 32 bits.
+    
+    Returns:
+        Array of unique uint64 shingle hashes
+    """
+    words = text.lower().split()
+    if not words:
+        return np.zeros(1, dtype=np.uint64)
+    
+    word_hashes = _word_hashes(words, {} if cache is None else cache)
+    k = min(shingle_size, len(word_hashes))
+    n = len(word_hashes) - k + 1
+    
+    # uint64 arithmetic wraps, which is what a rolling hash wants
+    h = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        h = h * SHINGLE_BASE + word_hashes[j:j + n]
+    h = (h ^ (h >> np.uint64(32))) & MAX_HASH
+    return np.unique(h)
+
+def make_permutations(num_perm=128, seed=1):
+    """Random (a, b) coefficients for num_perm universal hash functions"""
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    return a, b
+
+def minhash_signature(hashes, permutations):
+    """
+    MinHash signature of a set of shingle hashes
+    
+    Every permutation is applied to every shingle in one array operation;
+    the signature is the per-permutation minimum.
+    """
+    a, b = permutations
+    permuted = ((a[:, None] * hashes[None, :] + b[:, None]) % MERSENNE_PRIME) & MAX_HASH
+    return permuted.min(axis=1)
+
+def lsh_candidates(signatures, bands=16):
+    """
+    Candidate duplicate pairs: signatures that agree on every row of some band
+    
+    Args:
+        signatures: Array of shape (chunks, num_perm)
+        bands: Number of bands; num_perm must be divisible by it
+        
+    Returns:
+        Set of (i, j) index pairs with i < j
+    """
+    n, num_perm = signatures.shape
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be divisible by bands ({bands})")
+    rows = num_perm // bands
+    
+    pairs = set()
+    for band in range(bands):
+        buckets = {}
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i in range(n):
+            buckets.setdefault(block[i].tobytes(), []).append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+    return pairs
+
+def find_duplicates(chunk_sets, shingle_size=5, num_perm=128, bands=16,
+                    threshold=0.8, seed=1):
+    """
+    Find near-duplicate chunks within and across chunk lists
+    
+    Args:
+        chunk_sets: List of (source name, chunks) pairs, in priority order
+        shingle_size: Words per shingle
+        num_perm: MinHash permutations
+        bands: LSH bands (more bands find less similar pairs)
+        threshold: Minimum estimated Jaccard similarity to count as a duplicate
+        seed: Seed for the hash permutations
+        
+    Returns:
+        Dictionary mapping (source, chunk number) of each duplicate to the
+        (source, chunk number) of its canonical chunk, the first occurrence
+    """
+    ids = []
+    signatures = []
+    permutations = make_permutations(num_perm, seed)
+    cache = {}
+    for source, chunks in chunk_sets:
+        for chunk in chunks:
+            ids.append((source, chunk['number']))
+            signatures.append(minhash_signature(
+                shingle_hashes(chunk['text'], shingle_size, cache), permutations))
+    
+    if not ids:
+        return {}
+    signatures = np.vstack(signatures)
+    
+    # Union-find keyed by index; the smallest index (first occurrence) is the root
+    parent = list(range(len(ids)))
+    
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    for i, j in sorted(lsh_candidates(signatures, bands)):
+        similarity = np.mean(signatures[i] == signatures[j])
+        if similarity >= threshold:
+            ri, rj = root(i), root(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+    
+    return {ids[i]: ids[root(i)] for i in range(len(ids)) if root(i) != i}
+
+def fill_duplicate_summaries(summaries_by_source, chunks_by_source, duplicates):
+    """
+    Give every duplicate chunk a copy of its canonical chunk's summary
+    
+    Args:
+        summaries_by_source: source -> parsed summaries (canonical chunks at least)
+        chunks_by_source: source -> parsed chunks
+        duplicates: Mapping from find_duplicates()
+        
+    Returns:
+        source -> complete list of summaries ordered by number
+    """
+    lookup = {(source, s['number']): s
+              for source, summaries in summaries_by_source.items() for s in summaries}
+    
+    filled = {}
+    for source, chunks in chunks_by_source.items():
+        result = []
+        for chunk in chunks:
+            key = (source, chunk['number'])
+            summary = lookup.get(key)
+            if summary is None and key in duplicates:
+                canonical = lookup.get(duplicates[key])
+                if canonical is not None:
+                    summary = dict(canonical, number=chunk['number'],
+                                   start=chunk['start'], end=chunk['end'])
+            if summary is not None:
+                result.append(summary)
+        filled[source] = result
+    return filled
+
+def write_summaries_file(summaries, output_file):
+    """Write summaries in the standard summaries file format"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for s in summaries:
+            f.write(f"=== SUMMARY {s['number']}: Words {s['start']}-{s['end']} ===\n")
+            f.write(f"{s['word_count_line']}\n")
+            f.write(f"{s['text']}\n\n")
+
+def dedup_report(chunks_by_source, duplicates):
+    """Counts of chunks and words that no longer need summarizing, with the duplicate list"""
+    words = {(source, c['number']): c['word_count']
+             for source, chunks in chunks_by_source.items() for c in chunks}
+    total_words = sum(words.values())
+    saved_words = sum(words[key] for key in duplicates)
+    return {
+        'total_chunks': len(words),
+        'duplicate_chunks': len(duplicates),
+        'total_words': total_words,
+        'saved_words': saved_words,
+        'saved_percent': round(100 * saved_words / total_words, 1) if total_words else 0.0,
+        'duplicates': [
+            {'source': dup[0], 'chunk': dup[1],
+             'canonical_source': canon[0], 'canonical_chunk': canon[1]}
+            for dup, canon in sorted(duplicates.items())
+        ],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Find near-duplicate chunks so they are summarized once')
+    parser.add_argument('chunks', nargs='+', help='Chunks file(s); earlier files take priority')
+    parser.add_argument('-s', '--summaries', nargs='+',
+                       help='Summaries file for each chunks file; writes <name>_filled.txt '
+                            'with duplicate summaries copied from their canonical chunk')
+    parser.add_argument('-o', '--output', default='duplicates.json',
+                       help='Duplicate report JSON (default: duplicates.json)')
+    parser.add_argument('-k', '--shingle-size', type=int, default=5,
+                       help='Words per shingle (default: 5)')
+    parser.add_argument('--num-perm', type=int, default=128,
+                       help='MinHash permutations (default: 128)')
+    parser.add_argument('-b', '--bands', type=int, default=16,
+                       help='LSH bands (default: 16)')
+    parser.add_argument('-t', '--threshold', type=float, default=0.8,
+                       help='Minimum estimated similarity (default: 0.8)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                       help='List every duplicate')
+    
+    args = parser.parse_args()
+    
+    if args.summaries and len(args.summaries) != len(args.chunks):
+        print("Error: give one summaries file per chunks file")
+        return
+    
+    chunks_by_source = {}
+    for chunks_file in args.chunks:
+        if not Path(chunks_file).exists():
+            print(f"Error: Chunks file '{chunks_file}' not found")
+            return
+        chunks_by_source[chunks_file] = parse_chunks_file(chunks_file)
+    
+    try:
+        duplicates = find_duplicates(list(chunks_by_source.items()), args.shingle_size,
+                                     args.num_perm, args.bands, args.threshold)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    
+    report = dedup_report(chunks_by_source, duplicates)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    
+    print(f"\nDeduplication Summary:")
+    print(f"- Chunks: {report['total_chunks']}")
+    print(f"- Duplicates: {report['duplicate_chunks']}")
+    print(f"- Words not needing summaries: {report['saved_words']:,} "
+          f"of {report['total_words']:,} ({report['saved_percent']}%)")
+    print(f"- Report: {args.output}")
+    
+    if args.verbose:
+        for dup, canon in sorted(duplicates.items()):
+            print(f"  {dup[0]} chunk {dup[1]} -> {canon[0]} chunk {canon[1]}")
+    
+    if args.summaries:
+        summaries_by_source = {c: parse_summaries_file(s)
+                               for c, s in zip(args.chunks, args.summaries)}
+        filled = fill_duplicate_summaries(summaries_by_source, chunks_by_source, duplicates)
+        for chunks_file, summaries_file in zip(args.chunks, args.summaries):
+            path = Path(summaries_file)
+            output_file = path.parent / f"{path.stem}_filled.txt"
+            write_summaries_file(filled[chunks_file], output_file)
+            print(f"Created: {output_file}")
+
+if __name__ == "__main__":
+    main()
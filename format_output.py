@@ -5,6 +5,7 @@ Creates HTML, Markdown, and formatted text from chunks and summaries
 """
 
 import argparse
+import json
 from pathlib import Path
 from datetime import datetime
 import re
@@ -31,7 +32,7 @@ def parse_chunks_file(chunks_file):
                 'start': start_word,
                 'end': end_word,
                 'text': text,
-                'word_count': len(text.split())
+                'word_count': end_word - start_word + 1
             })
     
     return chunks
@@ -75,8 +76,136 @@ def parse_summaries_file(summaries_file):
     
     return summaries
 
-def create_html(book_title, book_author, chunks, summaries, output_file):
-    """Create HTML output with navigation and styling"""
+HTML_STYLE = """
+    body {
+        font-family: Georgia, serif;
+        line-height: 1.6;
+        max-width: 800px;
+        margin: 0 auto;
+        padding: 20px;
+        background-color: #f5f5f5;
+    }
+    .container {
+        background-color: white;
+        padding: 40px;
+        box-shadow: 0 0 10px rgba(0,0,0,0.1);
+    }
+    h1 {
+        color: #2c3e50;
+        text-align: center;
+        border-bottom: 3px solid #3498db;
+        padding-bottom: 10px;
+    }
+    h2 {
+        color: #34495e;
+        margin-top: 40px;
+    }
+    .metadata {
+        text-align: center;
+        color: #7f8c8d;
+        margin-bottom: 30px;
+    }
+    .summary {
+        background-color: #ecf0f1;
+        padding: 20px;
+        border-radius: 5px;
+        margin-bottom: 20px;
+    }
+    .summary h3 {
+        color: #2c3e50;
+        margin-top: 0;
+    }
+    .digest {
+        margin-bottom: 20px;
+    }
+    .digest .digest {
+        margin-left: 20px;
+        padding-left: 15px;
+        border-left: 3px solid #3498db;
+    }
+    .digest-text {
+        font-size: 1.05em;
+    }
+    .word-count {
+        font-style: italic;
+        color: #7f8c8d;
+        margin-bottom: 10px;
+    }
+    .nav {
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        background-color: #3498db;
+        color: white;
+        padding: 10px;
+        border-radius: 5px;
+        text-decoration: none;
+    }
+    .nav:hover {
+        background-color: #2980b9;
+    }
+    .toc li {
+        margin-bottom: 5px;
+    }
+    .search input {
+        width: 100%;
+        padding: 8px;
+        font-size: 1em;
+        box-sizing: border-box;
+    }
+    .search-result {
+        margin: 10px 0;
+    }
+    .pager {
+        display: flex;
+        justify-content: space-between;
+        margin: 20px 0;
+    }
+    @media print {
+        .nav {
+            display: none;
+        }
+    }
+"""
+
+def _html_summary(summary):
+    """Render one summary as an HTML block"""
+    return f"""
+        <div class="summary" id="summary-{summary['number']}">
+            <h3>Summary {summary['number']}: Words {summary['start']}-{summary['end']}</h3>
+            <p class="word-count">{summary['word_count_line']}</p>
+            <p>{summary['text']}</p>
+        </div>
+        """
+
+def _html_tree(node, depth=2):
+    """Render a summary tree node and its descendants as nested sections"""
+    if node['level'] == 0:
+        return f"""
+        <div class="summary">
+            <h3>{node['title']}: Words {node['start']}-{node['end']}</h3>
+            <p>{node['text']}</p>
+        </div>
+        """
+    
+    heading = f"h{min(depth, 6)}"
+    children = '\n'.join(_html_tree(child, depth + 1) for child in node['children'])
+    return f"""
+        <section class="digest">
+            <{heading}>{node['title']}: Words {node['start']}-{node['end']}</{heading}>
+            <p class="digest-text">{node['text']}</p>
+            {children}
+        </section>
+        """
+
+def render_html(book_title, book_author, chunks, summaries, tree=None):
+    """
+    Render the HTML output with navigation and styling as a string
+    
+    When a summary tree (from reduce_summaries.py) is given, it is rendered
+    as nested sections in place of the flat list of summaries; summaries
+    added since the tree was built follow it.
+    """
     
     html_template = """<!DOCTYPE html>
 <html lang="en">
@@ -85,67 +214,7 @@ def create_html(book_title, book_author, chunks, summaries, output_file):
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{title} - Summaries</title>
     <style>
-        body {{
-            font-family: Georgia, serif;
-            line-height: 1.6;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-            background-color: #f5f5f5;
-        }}
-        .container {{
-            background-color: white;
-            padding: 40px;
-            box-shadow: 0 0 10px rgba(0,0,0,0.1);
-        }}
-        h1 {{
-            color: #2c3e50;
-            text-align: center;
-            border-bottom: 3px solid #3498db;
-            padding-bottom: 10px;
-        }}
-        h2 {{
-            color: #34495e;
-            margin-top: 40px;
-        }}
-        .metadata {{
-            text-align: center;
-            color: #7f8c8d;
-            margin-bottom: 30px;
-        }}
-        .summary {{
-            background-color: #ecf0f1;
-            padding: 20px;
-            border-radius: 5px;
-            margin-bottom: 20px;
-        }}
-        .summary h3 {{
-            color: #2c3e50;
-            margin-top: 0;
-        }}
-        .word-count {{
-            font-style: italic;
-            color: #7f8c8d;
-            margin-bottom: 10px;
-        }}
-        .nav {{
-            position: fixed;
-            top: 20px;
-            right: 20px;
-            background-color: #3498db;
-            color: white;
-            padding: 10px;
-            border-radius: 5px;
-            text-decoration: none;
-        }}
-        .nav:hover {{
-            background-color: #2980b9;
-        }}
-        @media print {{
-            .nav {{
-                display: none;
-            }}
-        }}
+{style}
     </style>
 </head>
 <body>
@@ -164,27 +233,303 @@ def create_html(book_title, book_author, chunks, summaries, output_file):
 </html>"""
     
     content_parts = []
-    for summary in summaries:
-        content_parts.append(f"""
-        <div class="summary">
-            <h3>Summary {summary['number']}: Words {summary['start']}-{summary['end']}</h3>
-            <p class="word-count">{summary['word_count_line']}</p>
-            <p>{summary['text']}</p>
-        </div>
-        """)
+    remaining = summaries
+    if tree:
+        content_parts.append(_html_tree(tree))
+        remaining = _unplaced(summaries, tree)
+        if remaining:
+            content_parts.append('<h2>Summaries not in the digest</h2>')
+    for summary in remaining:
+        content_parts.append(_html_summary(summary))
     
-    html_content = html_template.format(
+    return html_template.format(
         title=book_title,
         author=book_author,
+        style=HTML_STYLE,
         date=datetime.now().strftime('%Y-%m-%d'),
         total_summaries=len(summaries),
         content='\n'.join(content_parts)
     )
+
+def create_html(book_title, book_author, chunks, summaries, output_file, tree=None):
+    """Create HTML output with navigation and styling"""
+    html_content = render_html(book_title, book_author, chunks, summaries, tree)
     
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(html_content)
 
-def create_markdown(book_title, book_author, chunks, summaries, output_file):
+SITE_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} - {page_title}</title>
+    <link rel="stylesheet" href="../style.css">
+</head>
+<body>
+    <a href="#top" class="nav">↑ Top</a>
+    <div class="container">
+        <h1 id="top">{title}</h1>
+        <h2>{page_title}</h2>
+        <div class="pager">{pager}</div>
+        {content}
+        <div class="pager">{pager}</div>
+    </div>
+</body>
+</html>
+"""
+
+SITE_INDEX_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} - Summaries</title>
+    <link rel="stylesheet" href="style.css">
+    <script src="search.js" defer></script>
+</head>
+<body>
+    <div class="container">
+        <h1 id="top">{title}</h1>
+        <div class="metadata">
+            <p><strong>Author:</strong> {author}</p>
+            <p><strong>Generated:</strong> {date}</p>
+            <p><strong>Total Summaries:</strong> {total_summaries}</p>
+        </div>
+        <div class="search">
+            <input id="search" type="search" placeholder="Search summaries...">
+            <div id="results"></div>
+        </div>
+        <h2>Contents</h2>
+        <ol class="toc">
+{toc}
+        </ol>
+    </div>
+</body>
+</html>
+"""
+
+# Static client: loads the search index on first use and fetches matching
+# pages only when their results are displayed
+SITE_SEARCH_JS = """(function () {
+    var input = document.getElementById('search');
+    var results = document.getElementById('results');
+    var index = null;
+    var pageOf = {};
+    var pages = {};
+
+    function loadIndex() {
+        if (!index) {
+            index = fetch('search-index.json').then(function (r) { return r.json(); })
+                .then(function (data) {
+                    data.pages.forEach(function (page, i) {
+                        page.ids.forEach(function (id) { pageOf[id] = i; });
+                    });
+                    return data;
+                });
+        }
+        return index;
+    }
+
+    function loadPage(file) {
+        if (!pages[file]) {
+            pages[file] = fetch('pages/' + file).then(function (r) { return r.text(); })
+                .then(function (html) {
+                    return new DOMParser().parseFromString(html, 'text/html');
+                });
+        }
+        return pages[file];
+    }
+
+    function search(data, query) {
+        // Query terms the index leaves out would match nothing, so skip them
+        var terms = (query.toLowerCase().match(/[a-z0-9]+/g) || []).filter(function (term) {
+            return term.length >= data.min_length && data.stopwords.indexOf(term) === -1;
+        });
+        var matches = null;
+        terms.forEach(function (term) {
+            var ids = Object.prototype.hasOwnProperty.call(data.terms, term) ? data.terms[term] : [];
+            matches = matches === null ? ids : matches.filter(function (id) {
+                return ids.indexOf(id) !== -1;
+            });
+        });
+        return matches === null ? null : matches.slice(0, 50);
+    }
+
+    function show(data, ids) {
+        if (ids === null) {
+            results.textContent = '';
+            return;
+        }
+        results.textContent = ids.length ? '' : 'No matches';
+        ids.forEach(function (id) {
+            var page = data.pages[pageOf[id]];
+            var item = document.createElement('div');
+            item.className = 'search-result';
+            var link = document.createElement('a');
+            link.href = 'pages/' + page.file + '#summary-' + id;
+            link.textContent = 'Summary ' + id + ' (' + page.title + ')';
+            item.appendChild(link);
+            results.appendChild(item);
+            loadPage(page.file).then(function (doc) {
+                var summary = doc.getElementById('summary-' + id);
+                if (summary) {
+                    var text = document.createElement('p');
+                    text.textContent = summary.lastElementChild.textContent.slice(0, 200) + '...';
+                    item.appendChild(text);
+                }
+            });
+        });
+    }
+
+    input.addEventListener('focus', loadIndex);
+    input.addEventListener('input', function () {
+        var query = input.value;
+        loadIndex().then(function (data) {
+            if (input.value === query) {
+                show(data, search(data, query));
+            }
+        });
+    });
+})();
+"""
+
+SEARCH_MIN_LENGTH = 3
+SEARCH_STOPWORDS = frozenset(
+    "the and for that with was his her had she him they their this from were "
+    "but not are have has who which when into its been would there what about "
+    "them then than also".split()
+)
+
+def _site_pages(summaries, page_size, tree=None):
+    """
+    Split summaries into pages
+    
+    With a summary tree, each first-level group (a chapter or fixed group)
+    starts a new page; otherwise pages hold page_size summaries each.
+    """
+    if tree and tree['level'] >= 1:
+        sections = []
+        
+        def collect(node):
+            if node['level'] == 1:
+                sections.append((node['title'], {c['number'] for c in node['children']}))
+            else:
+                for child in node['children']:
+                    collect(child)
+        collect(tree)
+        groups = [(title, [s for s in summaries if s['number'] in numbers])
+                  for title, numbers in sections]
+        # Summaries added since the tree was built go on trailing pages
+        placed = set().union(*(numbers for _, numbers in sections))
+        groups.append((None, [s for s in summaries if s['number'] not in placed]))
+    else:
+        groups = [(None, summaries)]
+    
+    pages = []
+    for title, group in groups:
+        for i in range(0, len(group), page_size):
+            part = group[i:i + page_size]
+            if not part:
+                continue
+            range_title = f"Summaries {part[0]['number']}-{part[-1]['number']}"
+            if title and len(group) > page_size:
+                range_title = f"{title} ({range_title})"
+            pages.append({
+                'file': f"page-{len(pages) + 1:04d}.html",
+                'title': title if title and len(group) <= page_size else range_title,
+                'summaries': part,
+            })
+    return pages
+
+def build_search_index(pages):
+    """Map each search term to the sorted summary numbers containing it"""
+    terms = {}
+    for page in pages:
+        for summary in page['summaries']:
+            for term in set(re.findall(r'[a-z0-9]+', summary['text'].lower())):
+                if len(term) >= SEARCH_MIN_LENGTH and term not in SEARCH_STOPWORDS:
+                    terms.setdefault(term, []).append(summary['number'])
+    return {
+        'min_length': SEARCH_MIN_LENGTH,
+        'stopwords': sorted(SEARCH_STOPWORDS),
+        'pages': [{'file': p['file'], 'title': p['title'],
+                   'ids': [s['number'] for s in p['summaries']]} for p in pages],
+        'terms': {term: sorted(ids) for term, ids in sorted(terms.items())},
+    }
+
+def _write_if_changed(path, content):
+    """Write content unless the file already holds it; return True if written"""
+    if path.exists() and path.read_text(encoding='utf-8') == content:
+        return False
+    path.write_text(content, encoding='utf-8')
+    return True
+
+def create_html_site(book_title, book_author, chunks, summaries, output_dir,
+                     page_size=50, tree=None):
+    """
+    Create a paginated HTML site with a lazily loaded search index
+    
+    Pages contain no generation date, so regenerating after adding summaries
+    only rewrites the pages whose summaries changed (plus the index files).
+    
+    Returns:
+        Tuple of (pages written, total pages)
+    """
+    output_dir = Path(output_dir)
+    pages_dir = output_dir / 'pages'
+    pages_dir.mkdir(parents=True, exist_ok=True)
+    
+    pages = _site_pages(summaries, page_size, tree)
+    written = 0
+    for i, page in enumerate(pages):
+        pager = [
+            f'<a href="{pages[i - 1]["file"]}">← Previous</a>' if i > 0 else '<span></span>',
+            '<a href="../index.html">Contents</a>',
+            f'<a href="{pages[i + 1]["file"]}">Next →</a>' if i + 1 < len(pages) else '<span></span>',
+        ]
+        html = SITE_PAGE_TEMPLATE.format(
+            title=book_title,
+            page_title=page['title'],
+            pager=' '.join(pager),
+            content='\n'.join(_html_summary(s) for s in page['summaries'])
+        )
+        written += _write_if_changed(pages_dir / page['file'], html)
+    
+    # Remove pages left over from a previous, longer run
+    current = {page['file'] for page in pages}
+    for old in pages_dir.glob('page-*.html'):
+        if old.name not in current:
+            old.unlink()
+    
+    toc = '\n'.join(
+        f'            <li><a href="pages/{p["file"]}">{p["title"]}</a> '
+        f'(words {p["summaries"][0]["start"]}-{p["summaries"][-1]["end"]})</li>'
+        for p in pages
+    )
+    _write_if_changed(output_dir / 'index.html', SITE_INDEX_TEMPLATE.format(
+        title=book_title,
+        author=book_author,
+        date=datetime.now().strftime('%Y-%m-%d'),
+        total_summaries=len(summaries),
+        toc=toc
+    ))
+    _write_if_changed(output_dir / 'style.css', HTML_STYLE.lstrip('\n'))
+    _write_if_changed(output_dir / 'search.js', SITE_SEARCH_JS)
+    _write_if_changed(output_dir / 'search-index.json',
+                      json.dumps(build_search_index(pages), separators=(',', ':')))
+    
+    return written, len(pages)
+
+def _markdown_tree(node, output, depth=2):
+    """Append a summary tree node and its descendants as nested headings"""
+    heading = '#' * min(depth, 6)
+    output.append(f"{heading} {node['title']}: Words {node['start']}-{node['end']}\n")
+    output.append(f"{node['text']}\n")
+    for child in node.get('children', []):
+        _markdown_tree(child, output, depth + 1)
+
+def create_markdown(book_title, book_author, chunks, summaries, output_file, tree=None):
     """Create Markdown output"""
     
     output = []
@@ -194,7 +539,14 @@ def create_markdown(book_title, book_author, chunks, summaries, output_file):
     output.append(f"**Total Summaries:** {len(summaries)}\n")
     output.append("\n---\n")
     
-    for summary in summaries:
+    remaining = summaries
+    if tree:
+        _markdown_tree(tree, output)
+        remaining = _unplaced(summaries, tree)
+        if remaining:
+            output.append("## Summaries not in the digest\n")
+    
+    for summary in remaining:
         output.append(f"## Summary {summary['number']}: Words {summary['start']}-{summary['end']}\n")
         output.append(f"*{summary['word_count_line']}*\n")
         output.append(f"{summary['text']}\n")
@@ -203,6 +555,17 @@ def create_markdown(book_title, book_author, chunks, summaries, output_file):
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write('\n'.join(output))
 
+def _leaf_numbers(node):
+    """Summary numbers of a summary tree's leaves"""
+    if node['level'] == 0:
+        return {node['number']}
+    return set().union(*(_leaf_numbers(child) for child in node['children']))
+
+def _unplaced(summaries, tree):
+    """Summaries missing from a summary tree, such as ones added after it was built"""
+    placed = _leaf_numbers(tree)
+    return [s for s in summaries if s['number'] not in placed]
+
 def create_text(book_title, book_author, chunks, summaries, output_file):
     """Create formatted text output"""
     
@@ -242,10 +605,17 @@ def main():
     parser.add_argument('-a', '--author', required=True, help='Book author')
     parser.add_argument('-o', '--output', help='Output base name (default: book_summaries)')
     parser.add_argument('-f', '--formats', nargs='+', 
-                       choices=['html', 'markdown', 'text', 'all'],
-                       default=['all'], help='Output formats to generate')
+                       choices=['html', 'html-site', 'markdown', 'text', 'all'],
+                       default=['all'], help='Output formats to generate '
+                       '(html-site is a paginated site, not included in all)')
+    parser.add_argument('--page-size', type=int, default=50,
+                       help='Summaries per page for html-site (default: 50)')
+    parser.add_argument('--tree', help='Summary tree from reduce_summaries.py '
+                       '(rendered as nested sections in HTML and Markdown)')
     
     args = parser.parse_args()
+    if args.page_size < 1:
+        parser.error('--page-size must be at least 1')
     
     # Parse input files
     chunks = []
@@ -256,6 +626,13 @@ def main():
     summaries = parse_summaries_file(args.summaries)
     print(f"Loaded {len(summaries)} summaries")
     
+    tree = None
+    if args.tree:
+        with open(args.tree, 'r', encoding='utf-8') as f:
+            tree = json.load(f)
+        # The root's level counts the levels above the leaf summaries
+        print(f"Loaded summary tree with {tree['level'] + 1} levels")
+    
     # Determine output base name
     output_base = args.output or 'book_summaries'
     
@@ -267,11 +644,16 @@ def main():
     for fmt in formats:
         if fmt == 'html':
             output_file = f"{output_base}.html"
-            create_html(args.title, args.author, chunks, summaries, output_file)
+            create_html(args.title, args.author, chunks, summaries, output_file, tree)
             print(f"Created: {output_file}")
+        elif fmt == 'html-site':
+            output_dir = f"{output_base}_site"
+            written, total = create_html_site(args.title, args.author, chunks, summaries,
+                                              output_dir, args.page_size, tree)
+            print(f"Created: {output_dir}/index.html ({written} of {total} pages updated)")
         elif fmt == 'markdown':
             output_file = f"{output_base}.md"
-            create_markdown(args.title, args.author, chunks, summaries, output_file)
+            create_markdown(args.title, args.author, chunks, summaries, output_file, tree)
             print(f"Created: {output_file}")
         elif fmt == 'text':
             output_file = f"{output_base}.txt"
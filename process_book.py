@@ -5,30 +5,31 @@ Orchestrates extraction, chunking, and formatting
 """
 
 import argparse
-import subprocess
 import sys
 from pathlib import Path
 import json
+import zipfile
 
-def run_command(cmd, verbose=False):
-    """Run a command and return success status"""
-    if verbose:
-        print(f"Running: {' '.join(cmd)}")
-    
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        print(f"Error running command: {' '.join(cmd)}")
-        print(f"Error: {result.stderr}")
-        return False
-    
-    if verbose and result.stdout:
-        print(result.stdout)
-    
-    return True
+from profiling import Profiler, NULL_PROFILER
+
+SCRIPTS_DIR = Path(__file__).resolve().parent / 'scripts'
 
-def process_book(config):
-    """Process a book according to configuration"""
+def process_book(config, profiler=NULL_PROFILER):
+    """
+    Process a book according to configuration
+    
+    Stages run in-process so that the profiler can time each one.
+    
+    Args:
+        config: Book configuration dictionary; 'epub_file' selects marker-based
+            EPUB extraction, 'input_file' reads any other supported format
+        profiler: Profiler recording a span per stage and spine item
+    """
+    from create_chunks import create_chunks, iter_chunks, save_chunks
+    from word_offsets import save_word_offsets
+    from readers import READ_ERRORS, read_segments
+    from format_output import (parse_chunks_file, parse_summaries_file,
+                               create_html, create_markdown, create_text)
     
     # Ensure output directory exists
     output_dir = Path(config.get('output_dir', 'output'))
@@ -36,42 +37,86 @@ def process_book(config):
     
     verbose = config.get('verbose', False)
     
-    # Step 1: Extract section
-    print(f"\n1. Extracting section from EPUB...")
-    extract_cmd = [
-        sys.executable, 'extract_book_section.py',
-        config['epub_file']
-    ]
-    
-    if 'start_markers' in config:
-        extract_cmd.extend(['-s'] + config['start_markers'])
-    if 'end_markers' in config:
-        extract_cmd.extend(['-e'] + config['end_markers'])
-    
     section_file = output_dir / f"{config['section_name']}_full.txt"
-    extract_cmd.extend(['-o', str(section_file)])
-    
-    if verbose:
-        extract_cmd.append('-v')
     
-    if not run_command(extract_cmd, verbose):
-        return False
+    # Step 1: Extract section
+    if 'epub_file' in config:
+        print(f"\n1. Extracting section from EPUB...")
+        with profiler.span('import_extractor'):
+            # BeautifulSoup is only imported once extraction is needed
+            if str(SCRIPTS_DIR) not in sys.path:
+                sys.path.insert(0, str(SCRIPTS_DIR))
+            from extract_book_section_fixed import extract_section
+        
+        with profiler.span('extract') as span:
+            try:
+                text, word_count, metadata = extract_section(
+                    config['epub_file'],
+                    start_markers=config.get('start_markers'),
+                    end_markers=config.get('end_markers'),
+                    verbose=verbose,
+                    profiler=profiler
+                )
+            except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+                print(f"Error extracting section: {e}")
+                return False
+            span.set(files=metadata['total_files'], chars_out=len(text), words=word_count)
+        
+        with profiler.span('write_section') as span:
+            with open(section_file, 'w', encoding='utf-8') as f:
+                f.write(text)
+            save_word_offsets(metadata['word_offsets'], section_file)
+            span.set(bytes_out=section_file.stat().st_size)
+        print(f"Extracted {word_count:,} words to: {section_file}")
+    else:
+        # Any other format is streamed through its reader into the section file
+        print(f"\n1. Reading {config['input_file']}...")
+        with profiler.span('read') as span:
+            try:
+                with open(section_file, 'w', encoding='utf-8') as f:
+                    for segment in read_segments(config['input_file'], config.get('reader')):
+                        f.write(segment)
+            except READ_ERRORS as e:
+                print(f"Error reading input: {e}")
+                return False
+            span.set(bytes_out=section_file.stat().st_size)
+        print(f"Wrote text to: {section_file}")
     
     # Step 2: Create chunks
     print(f"\n2. Creating chunks...")
     chunks_file = output_dir / f"{config['section_name']}_chunks.txt"
-    chunk_cmd = [
-        sys.executable, 'create_chunks.py',
-        str(section_file),
-        '-o', str(chunks_file),
-        '-s', str(config.get('chunk_size', 2000))
-    ]
+    with profiler.span('chunk') as span:
+        if 'epub_file' in config:
+            # Chunk boundaries come from the offset table built during extraction
+            chunks = create_chunks(text, config.get('chunk_size', 2000),
+                                   offsets=metadata['word_offsets'])
+        else:
+            chunks = list(iter_chunks(read_segments(section_file, 'text'),
+                                      config.get('chunk_size', 2000)))
+        span.set(chunks=len(chunks), words=chunks[-1]['end'] if chunks else 0)
+    
+    with profiler.span('save_chunks') as span:
+        save_chunks(chunks, chunks_file)
+        span.set(bytes_out=chunks_file.stat().st_size)
+    print(f"Created {len(chunks)} chunks: {chunks_file}")
     
     if verbose:
-        chunk_cmd.append('-v')
-    
-    if not run_command(chunk_cmd, verbose):
-        return False
+        for chunk in chunks:
+            print(f"  Chunk {chunk['number']}: {chunk['word_count']:,} words "
+                  f"(words {chunk['start']}-{chunk['end']})")
+    
+    # Optional: find repeated chunks that only need summarizing once
+    if config.get('dedup'):
+        from dedup_chunks import find_duplicates, dedup_report
+        duplicates_file = output_dir / f"{config['section_name']}_duplicates.json"
+        with profiler.span('dedup') as span:
+            duplicates = find_duplicates([(str(chunks_file), chunks)])
+            report = dedup_report({str(chunks_file): chunks}, duplicates)
+            span.set(duplicates=len(duplicates))
+        with open(duplicates_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Found {len(duplicates)} duplicate chunks "
+              f"({report['saved_words']:,} words need no summary): {duplicates_file}")
     
     # Step 3: Create placeholder for summaries
     print(f"\n3. Creating summaries placeholder...")
@@ -91,18 +136,21 @@ def process_book(config):
     # Step 4: Format output (only if summaries exist)
     if summaries_file.exists():
         print(f"\n4. Formatting output...")
-        format_cmd = [
-            sys.executable, 'format_output.py',
-            '-c', str(chunks_file),
-            '-s', str(summaries_file),
-            '-t', config['book_title'],
-            '-a', config['book_author'],
-            '-o', str(output_dir / config['section_name']),
-            '-f', 'all'
-        ]
+        with profiler.span('parse') as span:
+            chunks = parse_chunks_file(chunks_file)
+            summaries = parse_summaries_file(summaries_file)
+            span.set(chunks=len(chunks), summaries=len(summaries))
         
-        if not run_command(format_cmd, verbose):
-            return False
+        output_base = output_dir / config['section_name']
+        for stage, create, suffix in (('render_html', create_html, '.html'),
+                                      ('render_markdown', create_markdown, '.md'),
+                                      ('render_text', create_text, '.txt')):
+            output_file = Path(f"{output_base}{suffix}")
+            with profiler.span(stage) as span:
+                create(config['book_title'], config['book_author'],
+                       chunks, summaries, output_file)
+                span.set(bytes_out=output_file.stat().st_size)
+            print(f"Created: {output_file}")
     
     print(f"\n✓ Processing complete!")
     print(f"Output files in: {output_dir}")
@@ -114,9 +162,18 @@ def main():
     parser.add_argument('config', help='Configuration file (JSON)')
     parser.add_argument('-v', '--verbose', action='store_true',
                        help='Verbose output')
+    parser.add_argument('--profile', metavar='TRACE',
+                       help='Record stage and spine item timings to a Chrome trace JSON file')
+    parser.add_argument('--cprofile', action='store_true',
+                       help='Also run each stage under cProfile (requires --profile)')
+    parser.add_argument('--top', type=int, default=10,
+                       help='Slowest spine items to report with --profile (default: 10)')
     
     args = parser.parse_args()
     
+    if args.cprofile and not args.profile:
+        parser.error('--cprofile requires --profile TRACE')
+    
     # Load configuration
     config_path = Path(args.config)
     if not config_path.exists():
@@ -150,7 +207,13 @@ def main():
         config['verbose'] = True
     
     # Process the book
-    process_book(config)
+    profiler = Profiler(cprofile_stages=args.cprofile) if args.profile else NULL_PROFILER
+    process_book(config, profiler)
+    
+    if args.profile:
+        profiler.save_trace(args.profile)
+        print(f"\n{profiler.report(args.top)}")
+        print(f"\nSaved trace: {args.profile}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Lightweight timing spans for the processing pipeline
+Records stage and member timings and writes Chrome trace-event JSON
+"""
+
+import json
+import os
+import threading
+import time
+
+class _Span:
+    """A timed region; extra fields (bytes, words) can be attached with set()"""
+    
+    __slots__ = ('profiler', 'name', 'category', 'args', 'start', 'cprofile')
+    
+    def __init__(self, profiler, name, category, args):
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.args = args
+        self.cprofile = None
+    
+    def set(self, **args):
+        self.args.update(args)
+    
+    def __enter__(self):
+        if self.profiler.cprofile_stages and self.category == 'stage':
+            import cProfile
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.profiler.cprofiles.append((self.name, self.cprofile))
+        self.profiler.events.append({
+            'name': self.name,
+            'cat': self.category,
+            'ph': 'X',
+            'ts': (self.start - self.profiler.origin) * 1e6,
+            'dur': (end - self.start) * 1e6,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': self.args,
+        })
+        return False
+
+class _NullSpan:
+    """Shared no-op span returned when profiling is disabled"""
+    
+    __slots__ = ()
+    
+    def set(self, **args):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class Profiler:
+    """
+    Collects timing spans for pipeline stages and spine items
+    
+    A disabled profiler hands out one shared no-op span, so instrumented
+    code costs a method call per span. Callers should check ``enabled``
+    before computing expensive span arguments such as word counts.
+    
+    Args:
+        enabled: Record spans when True
+        cprofile_stages: Wrap each 'stage' span in cProfile
+    """
+    
+    def __init__(self, enabled=True, cprofile_stages=False):
+        self.enabled = enabled
+        self.cprofile_stages = cprofile_stages
+        self.origin = time.perf_counter()
+        self.events = []
+        self.cprofiles = []
+    
+    def span(self, name, category='stage', **args):
+        """Return a context manager timing the enclosed block"""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, category, args)
+    
+    def to_chrome_trace(self):
+        """Return the recorded spans in Chrome trace-event format"""
+        return {'traceEvents': self.events, 'displayTimeUnit': 'ms'}
+    
+    def save_trace(self, output_file):
+        """Write a trace loadable by chrome://tracing or Perfetto"""
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f)
+    
+    def slowest(self, n=10, category='member'):
+        """Return the n longest spans of a category, slowest first"""
+        spans = [e for e in self.events if e['cat'] == category]
+        return sorted(spans, key=lambda e: e['dur'], reverse=True)[:n]
+    
+    def report(self, n=10, cprofile_lines=15):
+        """Return a human-readable stage breakdown and slowest-member table"""
+        lines = ["Stage timings:"]
+        for event in self.events:
+            if event['cat'] == 'stage':
+                lines.append(f"  {event['name']:<20} {event['dur'] / 1000:10.1f} ms"
+                             f"{_format_args(event['args'])}")
+        
+        totals = {}
+        for event in self.events:
+            if event['cat'] not in ('stage', 'member'):
+                totals[event['cat']] = totals.get(event['cat'], 0) + event['dur']
+        if totals:
+            lines.append("\nTime by activity:")
+            for category, dur in sorted(totals.items(), key=lambda kv: kv[1], reverse=True):
+                lines.append(f"  {category:<20} {dur / 1000:10.1f} ms")
+        
+        members = self.slowest(n)
+        if members:
+            lines.append(f"\nSlowest {len(members)} members:")
+            for event in members:
+                lines.append(f"  {event['name']:<40} {event['dur'] / 1000:10.1f} ms"
+                             f"{_format_args(event['args'])}")
+        
+        if self.cprofiles:
+            import io
+            import pstats
+            for name, profile in self.cprofiles:
+                stream = io.StringIO()
+                stats = pstats.Stats(profile, stream=stream)
+                stats.sort_stats('cumulative').print_stats(cprofile_lines)
+                lines.append(f"\ncProfile for stage '{name}':")
+                lines.append(stream.getvalue().rstrip())
+        
+        return '\n'.join(lines)
+
+def _format_args(args):
+    """Render span arguments as a compact suffix"""
+    if not args:
+        return ''
+    return '  ' + ' '.join(f"{k}={v:,}" if isinstance(v, int) else f"{k}={v}"
+                           for k, v in args.items())
+
+# Module-level disabled profiler used as the default by instrumented functions
+NULL_PROFILER = Profiler(enabled=False)
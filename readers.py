@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Input readers for every supported source format
+Each reader lazily yields text segments so sources can be streamed
+"""
+
+import lzma
+import re
+import sys
+import zipfile
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent / 'scripts'
+
+# name -> (suffixes, reader function)
+READERS = {}
+
+# Characters read per plain-text segment
+BLOCK_SIZE = 1 << 16
+
+# Compressed suffix -> name of the standard library module that opens it
+COMPRESSORS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'lzma'}
+
+# Errors a reader raises for a missing, unreadable or corrupt source.
+# gzip and bz2 corruption is an OSError; truncated streams raise EOFError.
+READ_ERRORS = (OSError, ValueError, EOFError, zipfile.BadZipFile, lzma.LZMAError)
+
+def register_reader(name, suffixes=()):
+    """
+    Decorator registering a reader function under a format name
+    
+    A reader takes (path, encoding) and yields text segments. Segment
+    boundaries always fall between words.
+    """
+    def decorator(func):
+        READERS[name] = (tuple(suffixes), func)
+        return func
+    return decorator
+
+def detect_reader(path):
+    """
+    Choose a reader name from a path's suffixes
+    
+    Compressed files are detected by their outer suffix; the inner suffix
+    (book.md.gz) selects how the decompressed text is interpreted.
+    """
+    path = Path(path)
+    if path.is_dir():
+        return 'directory'
+    
+    suffixes = [s.lower() for s in path.suffixes]
+    if suffixes and suffixes[-1] in COMPRESSORS:
+        return 'compressed'
+    
+    suffix = suffixes[-1] if suffixes else ''
+    for name, (reader_suffixes, _) in READERS.items():
+        if suffix in reader_suffixes:
+            return name
+    return 'text'
+
+def read_segments(source, reader=None, encoding='utf-8'):
+    """
+    Iterate over the text of a source file or directory
+    
+    Args:
+        source: Path to a file or directory
+        reader: Reader name (default: detected from the path)
+        encoding: Text encoding for plain-text sources
+        
+    Returns:
+        Iterator of text segments
+    """
+    name = reader or detect_reader(source)
+    if name not in READERS:
+        raise ValueError(f"Unknown reader '{name}' (choose from: {', '.join(READERS)})")
+    return READERS[name][1](Path(source), encoding)
+
+def _blocks(f, block_size=BLOCK_SIZE):
+    """
+    Yield an open text file in blocks of about block_size characters
+    
+    Each block is cut after its last whitespace character and the rest is
+    carried into the next block, so no word spans two segments. Extracted
+    section files are a single line, so reading by line would load them whole.
+    """
+    carry = ''
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        block = carry + block
+        cut = len(block)
+        while cut and not block[cut - 1].isspace():
+            cut -= 1
+        if cut:
+            yield block[:cut]
+            carry = block[cut:]
+        else:
+            # No whitespace yet: the block is all one word, keep reading
+            carry = block
+    if carry:
+        yield carry
+
+@register_reader('text', ('.txt', '.text', ''))
+def read_plain_text(path, encoding='utf-8'):
+    """Yield a plain-text file in whitespace-aligned blocks"""
+    with open(path, 'r', encoding=encoding) as f:
+        yield from _blocks(f)
+
+_MARKDOWN_PATTERNS = [
+    (re.compile(r'^\s{0,3}(#{1,6}\s+|>\s?|[-*+]\s+|\d+[.)]\s+)'), ''),
+    (re.compile(r'^\s*(```|~~~|---+\s*$|\*\*\*+\s*$).*'), ''),
+    (re.compile(r'!\[([^\]]*)\]\([^)]*\)'), r'\1'),
+    (re.compile(r'\[([^\]]*)\]\([^)]*\)'), r'\1'),
+    (re.compile(r'<[^>]+>'), ''),
+    (re.compile(r'(\*\*|__|\*|`)'), ''),
+]
+
+def strip_markdown(line):
+    """Remove Markdown syntax from a single line, keeping the readable text"""
+    for pattern, replacement in _MARKDOWN_PATTERNS:
+        line = pattern.sub(replacement, line)
+    return line
+
+def _markdown_lines(f):
+    """Yield Markdown lines with syntax stripped"""
+    for line in f:
+        yield strip_markdown(line.rstrip('\n')) + '\n'
+
+@register_reader('markdown', ('.md', '.markdown'))
+def read_markdown(path, encoding='utf-8'):
+    """Yield a Markdown file line by line as plain text"""
+    with open(path, 'r', encoding=encoding) as f:
+        yield from _markdown_lines(f)
+
+@register_reader('compressed', tuple(COMPRESSORS))
+def read_compressed(path, encoding='utf-8'):
+    """Yield a gzip, bz2 or xz compressed text or Markdown file"""
+    import importlib
+    suffix = path.suffix.lower()
+    if suffix not in COMPRESSORS:
+        raise ValueError(f"Not a compressed file: {path} "
+                         f"(expected {', '.join(COMPRESSORS)})")
+    module = importlib.import_module(COMPRESSORS[suffix])
+    inner = Path(path.stem)
+    with module.open(path, 'rt', encoding=encoding) as f:
+        if detect_reader(inner) == 'markdown':
+            yield from _markdown_lines(f)
+        else:
+            yield from _blocks(f)
+
+@register_reader('epub', ('.epub',))
+def read_epub(path, encoding='utf-8'):
+    """Yield the cleaned text of each EPUB HTML member in numerical order"""
+    # BeautifulSoup is only imported when an EPUB is actually read
+    if str(SCRIPTS_DIR) not in sys.path:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+    from bs4 import BeautifulSoup
+    from extract_book_section_fixed import clean_text, natural_sort_key
+    
+    with zipfile.ZipFile(path, 'r') as epub:
+        html_files = [f for f in epub.namelist() if f.endswith('.html')]
+        for html_file in sorted(html_files, key=natural_sort_key):
+            content = epub.read(html_file).decode('utf-8', errors='ignore')
+            soup = BeautifulSoup(content, 'html.parser')
+            for element in soup(["script", "style"]):
+                element.extract()
+            text = clean_text(soup.get_text())
+            if text:
+                yield text + '\n'
+
+@register_reader('directory')
+def read_directory(path, encoding='utf-8'):
+    """Yield every readable file in a directory, in natural filename order"""
+    def key(p):
+        return [int(n) if n.isdigit() else n for n in re.split(r'(\d+)', p.name)]
+    
+    known = {s for suffixes, _ in READERS.values() for s in suffixes}
+    for child in sorted(path.iterdir(), key=key):
+        if (child.is_file() and not child.name.startswith('.')
+                and child.suffix.lower() in known):
+            yield from read_segments(child, encoding=encoding)
+            yield '\n'
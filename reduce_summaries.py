@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Hierarchical summary-of-summaries reduction
+Groups chunk summaries and summarizes each group, level by level, into a book digest
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from format_output import parse_chunks_file, parse_summaries_file
+
+CHAPTER_PATTERN = re.compile(
+    r'\b(?:CHAPTER|Chapter)\s+(?:[IVXLCDM]+|\d+|[A-Z][a-z]+)\b')
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+# A heading this close to the start of a chunk means the chunk opens the chapter
+CHAPTER_START_WORDS = 50
+
+def extractive_summary(texts, target_words=150):
+    """
+    Summarize texts by taking leading sentences from each in turn
+    
+    Used when no summarization command is configured. First sentences of
+    every child are taken before any second sentences, so each child is
+    represented; output follows the original order.
+    """
+    sentences = [SENTENCE_END.split(t.strip()) for t in texts if t.strip()]
+    chosen = [[] for _ in sentences]
+    words = 0
+    depth = 0
+    while words < target_words and any(depth < len(s) for s in sentences):
+        for i, child in enumerate(sentences):
+            if depth < len(child) and words < target_words:
+                chosen[i].append(child[depth])
+                words += len(child[depth].split())
+        depth += 1
+    return ' '.join(' '.join(c) for c in chosen if c)
+
+def command_summarizer(command, target_words=150):
+    """
+    Return a summarizer that pipes the group's text to a shell command
+    
+    The command receives the child summaries separated by blank lines on
+    stdin (and the target length in SUMMARY_WORDS) and prints the summary.
+    """
+    def summarize(texts):
+        env = dict(os.environ, SUMMARY_WORDS=str(target_words))
+        result = subprocess.run(command, shell=True, input='\n\n'.join(texts),
+                                capture_output=True, text=True, env=env, check=True)
+        return result.stdout.strip()
+    return summarize
+
+def detect_chapters(chunks):
+    """
+    Map each chunk number to the chapter it belongs to
+    
+    A chunk belongs to the chapter in progress at its start, or to the
+    chapter whose heading appears within its first CHAPTER_START_WORDS words.
+    
+    Returns:
+        Dictionary of chunk number -> chapter title
+    """
+    chapters = {}
+    current = 'Opening'
+    for chunk in chunks:
+        headings = list(CHAPTER_PATTERN.finditer(chunk['text']))
+        opening = ' '.join(chunk['text'].split()[:CHAPTER_START_WORDS])
+        first = CHAPTER_PATTERN.search(opening)
+        chapters[chunk['number']] = first.group(0) if first else current
+        if headings:
+            current = headings[-1].group(0)
+    return chapters
+
+def group_fixed(nodes, fan_out):
+    """Split nodes into consecutive groups of fan_out"""
+    return [nodes[i:i + fan_out] for i in range(0, len(nodes), fan_out)]
+
+def group_by_chapter(nodes, chapters):
+    """
+    Split leaf nodes into consecutive runs belonging to the same chapter
+    
+    Summaries with no matching chunk are grouped with their neighbours and
+    titled by summary range instead of by chapter.
+    """
+    groups = []
+    for node in nodes:
+        chapter = chapters.get(node['number'])
+        if groups and groups[-1][0] == chapter:
+            groups[-1][1].append(node)
+        else:
+            groups.append((chapter, [node]))
+    return [(chapter or f"Summaries {g[0]['number']}-{g[-1]['number']}", g)
+            for chapter, g in groups]
+
+def node_key(level, texts, summarizer_id):
+    """Cache key for a node: depends only on its children's texts and the summarizer"""
+    digest = hashlib.sha1()
+    digest.update(f"{summarizer_id}\0{level}".encode('utf-8'))
+    for text in texts:
+        digest.update(b'\0' + text.encode('utf-8'))
+    return digest.hexdigest()
+
+def build_tree(summaries, summarize, summarizer_id='extractive', fan_out=8,
+               chapters=None, cache=None, workers=4, verbose=False):
+    """
+    Reduce chunk summaries to a single book-level digest
+    
+    Args:
+        summaries: Parsed summaries (from parse_summaries_file)
+        summarize: Function taking a list of texts and returning a summary
+        summarizer_id: Identifies the summarizer in cache keys
+        fan_out: Children per node at every fixed-size level
+        chapters: Optional chunk number -> chapter mapping for the first level
+        cache: Dictionary of node key -> summary text, updated in place;
+            entries the tree no longer uses are removed
+        workers: Groups summarized in parallel at each level
+        verbose: Print progress information
+        
+    Returns:
+        Root node dictionary with nested 'children'
+        
+    Raises:
+        ValueError: If fan_out is below 2, which would never reduce to one node
+    """
+    if fan_out < 2:
+        raise ValueError(f"fan_out must be at least 2, got {fan_out}")
+    cache = {} if cache is None else cache
+    nodes = [{
+        'level': 0,
+        'number': s['number'],
+        'title': f"Summary {s['number']}",
+        'start': s['start'],
+        'end': s['end'],
+        'text': s['text'],
+    } for s in summaries]
+    
+    if not nodes:
+        return None
+    
+    used = set()
+    level = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while len(nodes) > 1 or level == 0:
+            level += 1
+            if level == 1 and chapters:
+                groups = group_by_chapter(nodes, chapters)
+            elif level == 1:
+                groups = [(f"Summaries {g[0]['number']}-{g[-1]['number']}", g)
+                          for g in group_fixed(nodes, fan_out)]
+            else:
+                groups = [(f"Part {i + 1}", g)
+                          for i, g in enumerate(group_fixed(nodes, fan_out))]
+            
+            keys = [node_key(level, [c['text'] for c in children], summarizer_id)
+                    for _, children in groups]
+            missing = {key: [c['text'] for c in children]
+                       for key, (_, children) in zip(keys, groups) if key not in cache}
+            
+            # Independent groups at a level are summarized in parallel
+            for key, text in zip(missing, pool.map(summarize, missing.values())):
+                cache[key] = text
+            used.update(keys)
+            
+            if verbose:
+                print(f"Level {level}: {len(groups)} groups "
+                      f"({len(missing)} summarized, {len(groups) - len(missing)} cached)")
+            
+            nodes = [{
+                'level': level,
+                'title': title,
+                'start': children[0]['start'],
+                'end': children[-1]['end'],
+                'text': cache[key],
+                'children': children,
+            } for key, (title, children) in zip(keys, groups)]
+    
+    # Drop nodes of earlier runs so the cache does not grow with every re-run
+    for key in [k for k in cache if k not in used]:
+        del cache[key]
+    
+    root = nodes[0]
+    root['title'] = 'Book digest'
+    return root
+
+def main():
+    parser = argparse.ArgumentParser(description='Reduce chunk summaries to a hierarchical book digest')
+    parser.add_argument('-s', '--summaries', required=True, help='Summaries file')
+    parser.add_argument('-c', '--chunks', help='Chunks file (needed for --group-by chapter)')
+    parser.add_argument('-g', '--group-by', choices=['fan-out', 'chapter'], default='fan-out',
+                       help='How to form the first level of groups (default: fan-out)')
+    parser.add_argument('-n', '--fan-out', type=int, default=8,
+                       help='Children per node at fixed-size levels (default: 8)')
+    parser.add_argument('--words', type=int, default=150,
+                       help='Target words per group summary (default: 150)')
+    parser.add_argument('--command',
+                       help='Shell command that reads text on stdin and prints its summary '
+                            '(default: built-in extractive summary)')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                       help='Groups summarized in parallel (default: 4)')
+    parser.add_argument('-o', '--output', help='Tree JSON file (default: <summaries>_tree.json)')
+    parser.add_argument('--cache', help='Node cache file (default: <output>_cache.json)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                       help='Print progress information')
+    
+    args = parser.parse_args()
+    if args.fan_out < 2:
+        parser.error('--fan-out must be at least 2')
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    
+    summaries_path = Path(args.summaries)
+    if not summaries_path.exists():
+        print(f"Error: Summaries file '{args.summaries}' not found")
+        return
+    
+    summaries = parse_summaries_file(summaries_path)
+    
+    chapters = None
+    if args.group_by == 'chapter':
+        if not args.chunks:
+            print("Error: --group-by chapter needs --chunks")
+            return
+        chapters = detect_chapters(parse_chunks_file(args.chunks))
+        unmatched = [s['number'] for s in summaries if s['number'] not in chapters]
+        if unmatched:
+            print(f"Warning: {len(unmatched)} summaries have no chunk in {args.chunks}; "
+                  f"grouping them by summary range")
+    
+    if args.command:
+        summarize = command_summarizer(args.command, args.words)
+        summarizer_id = f"command:{args.command}:{args.words}"
+    else:
+        summarize = lambda texts: extractive_summary(texts, args.words)
+        summarizer_id = f"extractive:{args.words}"
+    
+    output_path = Path(args.output or summaries_path.parent / f"{summaries_path.stem}_tree.json")
+    cache_path = Path(args.cache or output_path.parent / f"{output_path.stem}_cache.json")
+    cache = {}
+    if cache_path.exists():
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    
+    try:
+        tree = build_tree(summaries, summarize, summarizer_id, args.fan_out,
+                          chapters, cache, args.workers, args.verbose)
+    except subprocess.CalledProcessError as e:
+        print(f"Error: summarization command failed: {e.stderr.strip()}")
+        return
+    
+    if tree is None:
+        print("Error: no summaries found")
+        return
+    
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(tree, f, indent=2, ensure_ascii=False)
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, ensure_ascii=False)
+    
+    print(f"\nReduction Summary:")
+    print(f"- Summaries: {len(summaries)}")
+    print(f"- Levels: {tree['level']}")
+    print(f"- Digest words: {len(tree['text'].split())}")
+    print(f"- Output: {output_path}")
+
+if __name__ == "__main__":
+    main()
@@ -7,8 +7,15 @@ import zipfile
 import argparse
 from bs4 import BeautifulSoup
 import re
+import sys
 from pathlib import Path
 
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+from profiling import NULL_PROFILER
+from word_offsets import build_word_offsets, save_word_offsets
+
 def clean_text(text):
     """Clean extracted text from HTML and formatting artifacts"""
     # Remove HTML tags
@@ -37,7 +44,7 @@ def natural_sort_key(filename):
 
 def extract_section(epub_path, start_markers=None, end_markers=None, 
                    start_contains_all=False, end_contains_all=False,
-                   verbose=False):
+                   verbose=False, profiler=NULL_PROFILER):
     """
     Extract a section from an EPUB file based on content markers
     
@@ -48,6 +55,7 @@ def extract_section(epub_path, start_markers=None, end_markers=None,
         start_contains_all: If True, all start markers must be present
         end_contains_all: If True, all end markers must be present
         verbose: Print progress information
+        profiler: Profiler recording a span per spine item
         
     Returns:
         tuple: (extracted_text, word_count, metadata)
@@ -60,7 +68,8 @@ def extract_section(epub_path, start_markers=None, end_markers=None,
         'start_file': None,
         'end_file': None,
         'total_files': 0,
-        'file_order': []
+        'file_order': [],
+        'word_offsets': None
     }
     
     with zipfile.ZipFile(epub_path, 'r') as epub:
@@ -80,14 +89,24 @@ def extract_section(epub_path, start_markers=None, end_markers=None,
             if verbose:
                 print(f"Processing {html_file}...")
                 
-            content = epub.read(html_file).decode('utf-8', errors='ignore')
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # Remove script and style elements
-            for element in soup(["script", "style"]):
-                element.extract()
-            
-            text = soup.get_text()
+            with profiler.span(html_file, 'member') as member_span:
+                with profiler.span('decompress', 'decompress'):
+                    raw = epub.read(html_file)
+                
+                with profiler.span('parse', 'parse'):
+                    content = raw.decode('utf-8', errors='ignore')
+                    soup = BeautifulSoup(content, 'html.parser')
+                    
+                    # Remove script and style elements
+                    for element in soup(["script", "style"]):
+                        element.extract()
+                    
+                    text = soup.get_text()
+                
+                if profiler.enabled:
+                    member_span.set(bytes_compressed=epub.getinfo(html_file).compress_size,
+                                    bytes_in=len(raw), chars_out=len(text),
+                                    words=len(text.split()))
             
             # Check for start markers
             if not found_start and start_markers:
@@ -159,10 +178,13 @@ def extract_section(epub_path, start_markers=None, end_markers=None,
     
     # Join and clean the full text
     full_text = ' '.join(extracted_text)
-    full_text = clean_text(full_text)
+    with profiler.span('clean_text', 'clean'):
+        full_text = clean_text(full_text)
     
-    # Calculate word count
-    word_count = len(full_text.split())
+    # Calculate word count from the word offset table, shared with later stages
+    offsets = build_word_offsets(full_text)
+    metadata['word_offsets'] = offsets
+    word_count = len(offsets)
     
     return full_text, word_count, metadata
 
@@ -197,6 +219,7 @@ def main():
         output_path.parent.mkdir(parents=True, exist_ok=True)
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(text)
+        save_word_offsets(metadata['word_offsets'], output_path)
         print(f"\nSaved to: {output_path}")
     
     # Print summary
@@ -210,12 +233,12 @@ def main():
         print(f"  {f}")
     
     # Show preview
-    words = text.split()
-    if len(words) > 100:
+    offsets = metadata['word_offsets']
+    if len(offsets) > 100:
         print(f"\nFirst 100 words:")
-        print(' '.join(words[:100]) + '...')
+        print(offsets.words(text, 0, 100) + '...')
         print(f"\nLast 100 words:")
-        print('...' + ' '.join(words[-100:]))
+        print('...' + offsets.words(text, len(offsets) - 100, len(offsets)))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
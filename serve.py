@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Long-running local service wrapping the processing pipeline
+Keeps extracted books, chunk indexes and summaries warm between requests
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from create_chunks import create_chunks, iter_chunks
+from format_output import parse_summaries_file, render_html
+from readers import read_segments
+
+SCRIPTS_DIR = Path(__file__).resolve().parent / 'scripts'
+
+# Config keys that change the extracted text or chunk boundaries
+PARSE_KEYS = ('epub_file', 'input_file', 'reader', 'start_markers', 'end_markers',
+              'chunk_size')
+
+# Config keys that only change how a processed book is presented
+VIEW_KEYS = ('book_title', 'book_author', 'summaries_file')
+
+# Config keys naming files the server reads on a client's behalf
+PATH_KEYS = ('epub_file', 'input_file', 'summaries_file')
+
+def _digest(key):
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def parse_key(config):
+    """Identifier for the processed text a configuration describes"""
+    key = {k: config.get(k) for k in PARSE_KEYS}
+    source = config.get('epub_file') or config.get('input_file')
+    try:
+        stat = os.stat(source)
+        key['mtime'] = stat.st_mtime_ns
+        key['size'] = stat.st_size
+    except (OSError, TypeError):
+        pass
+    return _digest(key)
+
+def book_id(config):
+    """
+    Identifier for a book as submitted: its text plus title, author and summaries
+    
+    Submissions that differ only in presentation get different book ids but
+    share one processed copy of the text.
+    """
+    key = {k: config.get(k) for k in VIEW_KEYS}
+    key['text'] = parse_key(config)
+    return _digest(key)
+
+def validate_config(config, root):
+    """
+    Check a submitted configuration and resolve its file paths
+    
+    Relative paths are taken from root, and no path may resolve outside
+    it, so clients can only have the server read files under root.
+    
+    Returns:
+        Copy of config with absolute, resolved file paths
+        
+    Raises:
+        ValueError: If the configuration cannot be processed
+    """
+    if not (config.get('epub_file') or config.get('input_file')):
+        raise ValueError("Configuration needs 'epub_file' or 'input_file'")
+    chunk_size = config.get('chunk_size', 2000)
+    if not isinstance(chunk_size, int) or isinstance(chunk_size, bool) or chunk_size < 1:
+        raise ValueError("'chunk_size' must be a positive integer")
+    
+    config = dict(config)
+    for key in PATH_KEYS:
+        if not config.get(key):
+            continue
+        if not isinstance(config[key], str):
+            raise ValueError(f"'{key}' must be a path string")
+        path = (root / config[key]).resolve()
+        if not path.is_relative_to(root):
+            raise ValueError(f"'{key}' must be inside the served directory")
+        config[key] = str(path)
+    return config
+
+class LRUCache:
+    """Small thread-safe least-recently-used cache"""
+    
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        with self.lock:
+            if key not in self.items:
+                return None
+            self.items.move_to_end(key)
+            return self.items[key]
+    
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+class PipelineService:
+    """
+    Book processing with warm caches and a shared worker pool
+    
+    Submitting a book whose text is already being processed waits on the
+    in-flight work instead of parsing the book again. Each cached book
+    record carries the configuration it was submitted with, so it is
+    evicted together with the book. Finished jobs beyond max_jobs are
+    forgotten, oldest first.
+    
+    Args:
+        workers: Worker threads processing submitted books
+        max_books: Processed books kept in memory
+        max_jobs: Job records kept for status queries
+        root: Directory that submitted file paths must lie inside
+            (default: the working directory)
+    """
+    
+    def __init__(self, workers=4, max_books=16, max_jobs=1000, root=None):
+        self.root = Path(root or '.').resolve()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.parsed = LRUCache(max_books)  # parse key -> chunks
+        self.books = LRUCache(max_books)   # book id -> chunks plus submitted config
+        self.summaries = LRUCache(max_books)
+        self.html = LRUCache(max_books)
+        self.max_jobs = max_jobs
+        self.jobs = OrderedDict()
+        self.in_flight = {}  # parse key -> [(job, config), ...] waiting on it
+        self.lock = threading.Lock()
+    
+    def warm_up(self):
+        """Import the EPUB extractor (and BeautifulSoup) ahead of the first request"""
+        try:
+            self._extractor()
+        except ImportError as e:
+            print(f"EPUB support unavailable: {e}")
+    
+    def _extractor(self):
+        if str(SCRIPTS_DIR) not in sys.path:
+            sys.path.insert(0, str(SCRIPTS_DIR))
+        from extract_book_section_fixed import extract_section
+        return extract_section
+    
+    def submit(self, config):
+        """Queue a book for processing and return its job record"""
+        config = validate_config(config, self.root)
+        
+        pkey = parse_key(config)
+        bid = book_id(config)
+        with self.lock:
+            if self.books.get(bid) is not None:
+                return self._new_job(bid, 'done')
+            
+            parsed = self.parsed.get(pkey)
+            if parsed is not None:
+                self.books.put(bid, dict(parsed, config=config))
+                return self._new_job(bid, 'done')
+            
+            job = self._new_job(bid, 'queued')
+            if pkey in self.in_flight:
+                self.in_flight[pkey].append((job, config))
+            else:
+                self.in_flight[pkey] = [(job, config)]
+                self.pool.submit(self._run, pkey, config)
+        return job
+    
+    def _new_job(self, bid, status):
+        """Record a job, forgetting the oldest finished jobs beyond max_jobs"""
+        job = {'id': uuid.uuid4().hex[:12], 'book': bid, 'status': status, 'error': None}
+        self.jobs[job['id']] = job
+        if len(self.jobs) > self.max_jobs:
+            finished = [job_id for job_id, j in self.jobs.items()
+                        if j['status'] in ('done', 'failed')]
+            for job_id in finished[:len(self.jobs) - self.max_jobs]:
+                del self.jobs[job_id]
+        return job
+    
+    def _run(self, pkey, config):
+        with self.lock:
+            for job, _ in self.in_flight[pkey]:
+                job['status'] = 'running'
+        try:
+            parsed = self._process(config)
+            error = None
+        except Exception as e:
+            parsed = None
+            error = str(e)
+        
+        with self.lock:
+            waiting = self.in_flight.pop(pkey)
+            if parsed is not None:
+                self.parsed.put(pkey, parsed)
+            for job, job_config in waiting:
+                if parsed is not None:
+                    self.books.put(job['book'], dict(parsed, config=job_config))
+                    job['status'] = 'done'
+                else:
+                    job['status'] = 'failed'
+                    job['error'] = error
+    
+    def _process(self, config):
+        """Extract (or read) the text and build the chunk index in memory"""
+        if config.get('epub_file'):
+            text, _, metadata = self._extractor()(
+                config['epub_file'],
+                start_markers=config.get('start_markers'),
+                end_markers=config.get('end_markers')
+            )
+            chunks = create_chunks(text, config.get('chunk_size', 2000),
+                                   offsets=metadata['word_offsets'])
+        else:
+            chunks = list(iter_chunks(read_segments(config['input_file'], config.get('reader')),
+                                      config.get('chunk_size', 2000)))
+        return {
+            'chunks': chunks,
+            'total_words': chunks[-1]['end'] if chunks else 0,
+        }
+    
+    def job(self, job_id):
+        return self.jobs.get(job_id)
+    
+    def book(self, bid):
+        return self.books.get(bid)
+    
+    def _summaries_key(self, book):
+        """(path, mtime) of a book's summaries file, or None if it has none"""
+        summaries_file = book['config'].get('summaries_file')
+        try:
+            return (summaries_file, os.stat(summaries_file).st_mtime_ns)
+        except (OSError, TypeError):
+            return None
+    
+    def book_summaries(self, book):
+        """Parsed summaries for a book record, re-read only when the file changes"""
+        key = self._summaries_key(book)
+        if key is None:
+            return []
+        summaries = self.summaries.get(key)
+        if summaries is None:
+            summaries = parse_summaries_file(key[0])
+            self.summaries.put(key, summaries)
+        return summaries
+    
+    def book_html(self, bid, book):
+        """Rendered HTML page for a book record, cached until its summaries change"""
+        config = book['config']
+        title = config.get('book_title', 'Untitled')
+        author = config.get('book_author', 'Unknown')
+        key = (bid, self._summaries_key(book))
+        html = self.html.get(key)
+        if html is None:
+            html = render_html(title, author, book['chunks'], self.book_summaries(book))
+            self.html.put(key, html)
+        return html
+    
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """
+    JSON endpoints:
+        POST /books                     submit a book configuration
+        GET  /jobs/<job>                job status
+        GET  /books/<book>              book metadata
+        GET  /books/<book>/chunks/<n>   a single chunk
+        GET  /books/<book>/summaries    parsed summaries
+        GET  /books/<book>/html         rendered HTML page
+    """
+    
+    server_version = 'TextSummarizer/1.0'
+    
+    @property
+    def service(self):
+        return self.server.service
+    
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'unix'
+    
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+    
+    def send_json(self, data, status=200):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def send_error_json(self, status, message):
+        self.send_json({'error': message}, status)
+    
+    def do_POST(self):
+        if self.path.rstrip('/') != '/books':
+            return self.send_error_json(404, 'Not found')
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            if length < 0:
+                raise ValueError('Content-Length must not be negative')
+            config = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(config, dict):
+                raise ValueError('Request body must be a JSON object')
+            job = self.service.submit(config)
+        except (ValueError, TypeError) as e:
+            return self.send_error_json(400, str(e))
+        self.send_json(job, 200 if job['status'] == 'done' else 202)
+    
+    def do_GET(self):
+        parts = [p for p in self.path.split('?')[0].split('/') if p]
+        
+        if len(parts) == 2 and parts[0] == 'jobs':
+            job = self.service.job(parts[1])
+            return self.send_json(job) if job else self.send_error_json(404, 'Unknown job')
+        
+        if len(parts) < 2 or parts[0] != 'books':
+            return self.send_error_json(404, 'Not found')
+        
+        book = self.service.book(parts[1])
+        if book is None:
+            return self.send_error_json(404, 'Unknown or unprocessed book')
+        
+        if len(parts) == 2:
+            return self.send_json({
+                'book': parts[1],
+                'title': book['config'].get('book_title'),
+                'total_words': book['total_words'],
+                'total_chunks': len(book['chunks']),
+            })
+        
+        if len(parts) == 4 and parts[2] == 'chunks':
+            try:
+                n = int(parts[3])
+            except ValueError:
+                return self.send_error_json(400, 'Chunk number must be an integer')
+            if not 1 <= n <= len(book['chunks']):
+                return self.send_error_json(404, f'Chunk {n} out of range')
+            return self.send_json(book['chunks'][n - 1])
+        
+        if len(parts) == 3 and parts[2] == 'summaries':
+            return self.send_json(self.service.book_summaries(book))
+        
+        if len(parts) == 3 and parts[2] == 'html':
+            body = self.service.book_html(parts[1], book).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        
+        self.send_error_json(404, 'Not found')
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP over a Unix domain socket"""
+    daemon_threads = True
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the processing pipeline over local HTTP')
+    parser.add_argument('--host', default='127.0.0.1', help='Bind address (default: 127.0.0.1)')
+    parser.add_argument('-p', '--port', type=int, default=8765, help='TCP port (default: 8765)')
+    parser.add_argument('--socket', help='Listen on this Unix socket path instead of TCP')
+    parser.add_argument('-w', '--workers', type=int, default=4,
+                       help='Worker threads for processing books (default: 4)')
+    parser.add_argument('--max-books', type=int, default=16,
+                       help='Processed books kept in memory (default: 16)')
+    parser.add_argument('--max-jobs', type=int, default=1000,
+                       help='Job records kept for status queries (default: 1000)')
+    parser.add_argument('--root', default='.',
+                       help='Directory that submitted file paths must lie inside '
+                            '(default: the working directory)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                       help='Log every request')
+    
+    args = parser.parse_args()
+    
+    if not Path(args.root).is_dir():
+        parser.error(f"--root '{args.root}' is not a directory")
+    
+    service = PipelineService(args.workers, args.max_books, args.max_jobs, args.root)
+    service.warm_up()
+    
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        server = UnixHTTPServer(args.socket, RequestHandler)
+        where = f"unix:{args.socket}"
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), RequestHandler)
+        where = f"http://{args.host}:{server.server_address[1]}"
+    server.service = service
+    server.verbose = args.verbose
+    
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    signal.signal(signal.SIGTERM, stop)
+    
+    print(f"Serving on {where} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down")
+    finally:
+        server.server_close()
+        service.shutdown()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Precomputed word boundary table for a text
+Built once per text, persisted next to it, and sliced by every later stage
+"""
+
+import functools
+import re
+from array import array
+from pathlib import Path
+
+# Every code point for which str.isspace() (and so str.split()) breaks words
+WHITESPACE_CODES = (
+    [0x09, 0x0a, 0x0b, 0x0c, 0x0d, 0x1c, 0x1d, 0x1e, 0x1f, 0x20, 0x85, 0xa0, 0x1680]
+    + list(range(0x2000, 0x200b))
+    + [0x2028, 0x2029, 0x202f, 0x205f, 0x3000]
+)
+
+_WORD = re.compile(r'\S+')
+
+@functools.lru_cache(maxsize=None)
+def _numpy():
+    """
+    Return the numpy module, or None if it is not installed
+    
+    Imported on first use so that importing this module (and the CLIs
+    that do) stays fast when no table is built or loaded.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+class WordOffsets:
+    """
+    Start and end character offsets of every word in a text
+    
+    Word i is text[starts[i]:ends[i]], matching the i-th item of
+    text.split(). Offsets are int64, held in a NumPy array when NumPy is
+    installed and in array('q') otherwise.
+    
+    Args:
+        starts: Start offset of each word
+        ends: End offset (exclusive) of each word
+        text_length: Length of the text the offsets describe
+        normalized: True if words are separated by exactly one space
+    """
+    
+    def __init__(self, starts, ends, text_length, normalized):
+        self.starts = starts
+        self.ends = ends
+        self.text_length = text_length
+        self.normalized = normalized
+    
+    def __len__(self):
+        return len(self.starts)
+    
+    def words(self, text, first, last):
+        """
+        Text of words first..last-1 joined by single spaces
+        
+        Equivalent to ' '.join(text.split()[first:last]) without
+        tokenizing the whole text.
+        """
+        if first >= last:
+            return ''
+        piece = text[self.starts[first]:self.ends[last - 1]]
+        if self.normalized:
+            return piece
+        # Collapsing other whitespace only touches this slice, not the whole text
+        return ' '.join(piece.split())
+    
+    def save(self, output_file):
+        """Write the table as native int64: text length, word count, flag, starts, ends"""
+        with open(output_file, 'wb') as f:
+            array('q', [self.text_length, len(self), int(self.normalized)]).tofile(f)
+            self.starts.tofile(f)
+            self.ends.tofile(f)
+    
+    @classmethod
+    def load(cls, input_file):
+        """Read a table written by save()"""
+        np = _numpy()
+        if np is not None:
+            data = np.fromfile(input_file, dtype=np.int64)
+        else:
+            data = array('q')
+            with open(input_file, 'rb') as f:
+                data.frombytes(f.read())
+        text_length, n, normalized = (int(v) for v in data[:3])
+        if len(data) != 3 + 2 * n:
+            raise ValueError(f"Corrupt word offsets file: {input_file}")
+        return cls(data[3:3 + n], data[3 + n:], text_length, bool(normalized))
+
+def _build_numpy(text):
+    """Find word boundaries with whole-array operations"""
+    np = _numpy()
+    if text.isascii():
+        codes = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+        table = np.zeros(256, dtype=bool)
+        table[[c for c in WHITESPACE_CODES if c < 256]] = True
+        space = table[codes]
+    else:
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        space = np.isin(codes, np.array(WHITESPACE_CODES, dtype=np.uint32))
+    
+    # Word edges are where the space mask flips
+    padded = np.concatenate(([True], space, [True]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1]).astype(np.int64)
+    starts = edges[0::2]
+    ends = edges[1::2]
+    
+    normalized = bool(np.all(starts[1:] - ends[:-1] == 1)
+                      and np.all(codes[ends[:-1]] == 0x20))
+    return starts, ends, normalized
+
+def _build_regex(text):
+    """Find word boundaries with one regex pass"""
+    starts = array('q')
+    ends = array('q')
+    normalized = True
+    prev_end = None
+    for match in _WORD.finditer(text):
+        start, end = match.span()
+        if prev_end is not None and (start != prev_end + 1 or text[prev_end] != ' '):
+            normalized = False
+        starts.append(start)
+        ends.append(end)
+        prev_end = end
+    return starts, ends, normalized
+
+def build_word_offsets(text):
+    """Build the word offset table for a text"""
+    builder = _build_numpy if _numpy() is not None else _build_regex
+    starts, ends, normalized = builder(text)
+    return WordOffsets(starts, ends, len(text), normalized)
+
+def offsets_path(text_file):
+    """Where the offset table for a text file is stored"""
+    return Path(f"{text_file}.offsets")
+
+def save_word_offsets(offsets, text_file):
+    """Persist an offset table next to the text file it describes"""
+    path = offsets_path(text_file)
+    offsets.save(path)
+    return path
+
+def load_word_offsets(text_file, text):
+    """
+    Load the persisted offset table for a text file
+    
+    Returns:
+        WordOffsets, or None if no table exists or it describes another text
+    """
+    path = offsets_path(text_file)
+    if not path.exists() or path.stat().st_mtime < Path(text_file).stat().st_mtime:
+        return None
+    try:
+        offsets = WordOffsets.load(path)
+    except (OSError, ValueError):
+        return None
+    return offsets if offsets.text_length == len(text) else None